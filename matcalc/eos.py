@@ -9,7 +9,7 @@ from pymatgen.analysis.eos import BirchMurnaghan
 from sklearn.metrics import r2_score
 
 from .base import PropCalc
-from .relaxation import RelaxCalc
+from .relaxation import RelaxCalc, is_relaxed
 
 if TYPE_CHECKING:
     from ase.calculators.calculator import Calculator
@@ -41,7 +41,8 @@ class EOSCalc(PropCalc):
             n_points (int): Number of points in which to compute the EOS. Defaults to 11.
             fmax (float): Max force for relaxation (of structure as well as atoms).
             relax_structure: Whether to first relax the structure. Set to False if structures provided are pre-relaxed
-                with the same calculator. Defaults to True.
+                with the same calculator. Skipped if the structure was already relaxed by RelaxCalc with the same
+                calculator to at most fmax and not modified since (see is_relaxed). Defaults to True.
             relax_calc_kwargs: Arguments to be passed to the RelaxCalc, if relax_structure is True.
         """
         self.calculator = calculator
@@ -69,7 +70,7 @@ class EOSCalc(PropCalc):
             calculations. This value should be at least around 1 - 1e-4 to 1 - 1e-5.
         }
         """
-        if self.relax_structure:
+        if self.relax_structure and not is_relaxed(structure, self.fmax, self.calculator):
             relaxer = RelaxCalc(
                 self.calculator,
                 optimizer=self.optimizer,
@@ -5,20 +5,22 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
+import numpy as np
 import phonopy
+from ase import Atoms
+from joblib import Parallel, delayed, effective_n_jobs
+from phonopy.file_IO import parse_FORCE_CONSTANTS as parse_force_constants
 from phonopy.file_IO import write_FORCE_CONSTANTS as write_force_constants
-from pymatgen.io.ase import AseAtomsAdaptor
-from pymatgen.io.phonopy import get_phonopy_structure, get_pmg_structure
+from pymatgen.io.phonopy import get_phonopy_structure
 
 from .base import PropCalc
-from .relaxation import RelaxCalc
+from .relaxation import RelaxCalc, is_relaxed
 
 if TYPE_CHECKING:
     from pathlib import Path
 
     from ase.calculators.calculator import Calculator
     from numpy.typing import ArrayLike
-    from phonopy.structure.atoms import PhonopyAtoms
     from pymatgen.core import Structure
 
 
@@ -37,12 +39,18 @@ class PhononCalc(PropCalc):
         t_max (float): Max temperature (in Kelvin).
         t_min (float): Min temperature (in Kelvin).
         relax_structure (bool): Whether to first relax the structure. Set to False if structures
-            provided are pre-relaxed with the same calculator.
+            provided are pre-relaxed with the same calculator. Skipped if the structure was already relaxed
+            by RelaxCalc with the same calculator to at most fmax and not modified since (see is_relaxed).
         relax_calc_kwargs (dict): Arguments to be passed to the RelaxCalc, if relax_structure is True.
         write_force_constants (bool | str | Path): Whether to save force constants. Pass string or Path
             for custom filename. Set to False for storage conservation. This file can be very large, be
             careful when doing high-throughput. Defaults to False.
         calculations.
+        force_constants_format (str): Format used to save force constants, either "text" for phonopy's
+            FORCE_CONSTANTS format or "npz" for a compressed numpy archive, which is much faster to write and
+            read for large supercells. For "npz", the .npz extension is appended to the filename if missing (the
+            default filename is force_constants.npz). Force constants saved in either format can be read back
+            with load_force_constants. Defaults to "text".
         write_band_structure (bool | str | Path): Whether to calculate and save band structure
             (in yaml format). Defaults to False. Pass string or Path for custom filename.
         write_total_dos (bool | str | Path): Whether to calculate and save density of states
@@ -51,6 +59,13 @@ class PhononCalc(PropCalc):
             necessary phonon calculation results. Band structure, density of states, thermal properties,
             etc. can be rebuilt from this file using the phonopy API via phonopy.load("phonon.yaml").
             Defaults to True. Pass string or Path for custom filename.
+        n_jobs (int | None): The maximum number of concurrently running force calculations on the displaced
+            supercells. Passed to joblib.Parallel. Defaults to 1 to avoid oversubscribing calculators that are
+            already multithreaded.
+        run_mesh (bool): Whether to run the phonon calculation on a reciprocal-space mesh. Always done if
+            run_thermal is True. Defaults to True.
+        run_thermal (bool): Whether to calculate thermal properties. Set to False along with run_mesh when only
+            force constants are needed. Defaults to True.
     """
 
     calculator: Calculator
@@ -64,12 +79,19 @@ class PhononCalc(PropCalc):
     relax_structure: bool = True
     relax_calc_kwargs: dict | None = None
     write_force_constants: bool | str | Path = False
+    force_constants_format: str = "text"
     write_band_structure: bool | str | Path = False
     write_total_dos: bool | str | Path = False
     write_phonon: bool | str | Path = True
+    n_jobs: int | None = 1
+    run_mesh: bool = True
+    run_thermal: bool = True
 
     def __post_init__(self) -> None:
         """Set default paths for where to save output files."""
+        if self.force_constants_format not in ("text", "npz"):
+            fmt = self.force_constants_format
+            raise ValueError(f"Unknown force_constants_format={fmt!r}, must be 'text' or 'npz'")
         # map True to canonical default path, False to "" and Path to str
         for key, val, default_path in (
             ("write_force_constants", self.write_force_constants, "force_constants"),
@@ -78,6 +100,9 @@ class PhononCalc(PropCalc):
             ("write_phonon", self.write_phonon, "phonon.yaml"),
         ):
             setattr(self, key, str({True: default_path, False: ""}.get(val, val)))  # type: ignore[arg-type]
+        # np.savez_compressed appends .npz if missing, so store the name of the file actually written
+        if self.force_constants_format == "npz" and self.write_force_constants:
+            self.write_force_constants = str(self.write_force_constants).removesuffix(".npz") + ".npz"
 
     def calc(self, structure: Structure) -> dict:
         """Calculates thermal properties of Pymatgen structure with phonopy.
@@ -88,7 +113,7 @@ class PhononCalc(PropCalc):
         Returns:
         {
             phonon: Phonopy object with force constants produced
-            thermal_properties:
+            thermal_properties (None if run_thermal is False):
                 {
                     temperatures: list of temperatures in Kelvin,
                     free_energy: list of Helmholtz free energies at corresponding temperatures in kJ/mol,
@@ -108,7 +133,7 @@ class PhononCalc(PropCalc):
                 }
         }
         """
-        if self.relax_structure:
+        if self.relax_structure and not is_relaxed(structure, self.fmax, self.calculator):
             relaxer = RelaxCalc(
                 self.calculator, fmax=self.fmax, optimizer=self.optimizer, **(self.relax_calc_kwargs or {})
             )
@@ -116,35 +141,78 @@ class PhononCalc(PropCalc):
         cell = get_phonopy_structure(structure)
         phonon = phonopy.Phonopy(cell, self.supercell_matrix)
         phonon.generate_displacements(distance=self.atom_disp)
-        disp_supercells = phonon.supercells_with_displacements
+        # displaced supercells only differ in atomic positions, so a single template Atoms is updated in place
+        # per job. This lets calculators reuse cached data such as neighbor lists.
+        supercell = phonon.supercell
+        atoms = Atoms(numbers=supercell.numbers, positions=supercell.positions, cell=supercell.cell, pbc=True)
+        positions = np.array(
+            [
+                disp_supercell.positions
+                for disp_supercell in phonon.supercells_with_displacements
+                if disp_supercell is not None
+            ]
+        )
+        parallel = Parallel(n_jobs=self.n_jobs)
         phonon.forces = [
-            _calc_forces(self.calculator, supercell) for supercell in disp_supercells if supercell is not None
+            forces
+            for chunk_forces in parallel(
+                delayed(_calc_forces)(self.calculator, atoms, chunk)
+                for chunk in np.array_split(positions, min(effective_n_jobs(self.n_jobs), len(positions)))
+            )
+            for forces in chunk_forces
         ]
         phonon.produce_force_constants()
-        phonon.run_mesh()
-        phonon.run_thermal_properties(t_step=self.t_step, t_max=self.t_max, t_min=self.t_min)
+        if self.run_mesh or self.run_thermal:
+            phonon.run_mesh()
+        if self.run_thermal:
+            phonon.run_thermal_properties(t_step=self.t_step, t_max=self.t_max, t_min=self.t_min)
         if self.write_force_constants:
-            write_force_constants(phonon.force_constants, filename=self.write_force_constants)
+            if self.force_constants_format == "npz":
+                np.savez_compressed(self.write_force_constants, force_constants=phonon.force_constants)
+            else:
+                write_force_constants(phonon.force_constants, filename=self.write_force_constants)
         if self.write_band_structure:
             phonon.auto_band_structure(write_yaml=True, filename=self.write_band_structure)
         if self.write_total_dos:
             phonon.auto_total_dos(write_dat=True, filename=self.write_total_dos)
         if self.write_phonon:
             phonon.save(filename=self.write_phonon)
-        return {"phonon": phonon, "thermal_properties": phonon.get_thermal_properties_dict()}
+        thermal_properties = phonon.get_thermal_properties_dict() if self.run_thermal else None
+        return {"phonon": phonon, "thermal_properties": thermal_properties}
+
+
+def load_force_constants(filename: str | Path) -> np.ndarray:
+    """Load force constants saved by PhononCalc, e.g. to assign to phonopy.Phonopy.force_constants.
+
+    Args:
+        filename: Path to force constants in npz format (if the filename ends with .npz) or phonopy's
+            FORCE_CONSTANTS format.
+
+    Returns:
+        force constants
+    """
+    if str(filename).endswith(".npz"):
+        with np.load(filename) as data:
+            return data["force_constants"]
+    return parse_force_constants(filename=str(filename))
 
 
-def _calc_forces(calculator: Calculator, supercell: PhonopyAtoms) -> ArrayLike:
-    """Helper to compute forces on a structure.
+def _calc_forces(calculator: Calculator, atoms: Atoms, positions: ArrayLike) -> list[np.ndarray]:
+    """Helper to compute forces on a supercell for a series of atomic displacements. A single copy of atoms
+    is updated in place for every set of positions so that the calculator can reuse its internal caches.
 
     Args:
         calculator: ASE Calculator
-        supercell: Supercell from phonopy.
+        atoms: ASE Atoms of the undisplaced supercell. Not modified.
+        positions: Sequence of Cartesian positions of the displaced supercells.
 
     Return:
-        forces
+        list of forces
     """
-    struct = get_pmg_structure(supercell)
-    atoms = AseAtomsAdaptor.get_atoms(struct)
+    atoms = atoms.copy()
     atoms.calc = calculator
-    return atoms.get_forces()
+    forces = []
+    for disp_positions in positions:
+        atoms.set_positions(disp_positions)
+        forces.append(atoms.get_forces())
+    return forces
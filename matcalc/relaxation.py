@@ -5,8 +5,11 @@ from __future__ import annotations
 import contextlib
 import io
 import pickle
+import uuid
+import weakref
 from typing import TYPE_CHECKING
 
+import numpy as np
 from ase.filters import FrechetCellFilter
 from pymatgen.io.ase import AseAtomsAdaptor
 
@@ -15,7 +18,6 @@ from matcalc.utils import get_ase_optimizer
 from .base import PropCalc
 
 if TYPE_CHECKING:
-    import numpy as np
     from ase import Atoms
     from ase.calculators.calculator import Calculator
     from ase.filters import Filter
@@ -23,6 +25,71 @@ if TYPE_CHECKING:
     from pymatgen.core import Structure
 
 
+# key in Structure.properties recording how (fmax, calculator) and into what geometry RelaxCalc relaxed a structure
+RELAXED_KEY = "matcalc_relaxed"
+# absolute tolerance in A (lattice) and fractional units (sites) within which a structure matches its relaxed geometry
+RELAXED_TOL = 1e-6
+
+# unique tokens of the calculators used for relaxations. Unlike id(), tokens are never reused after a calculator is
+# garbage collected, so a structure relaxed with one calculator can't match another.
+_CALCULATOR_TOKENS: weakref.WeakKeyDictionary[Calculator, str] = weakref.WeakKeyDictionary()
+
+
+def _get_calculator_token(calculator: Calculator) -> str | None:
+    """Unique token of a calculator object, or None if the calculator can't be weakly referenced."""
+    try:
+        return _CALCULATOR_TOKENS.setdefault(calculator, uuid.uuid4().hex)
+    except TypeError:
+        return None
+
+
+def _get_relaxed_tag(structure: Structure, fmax: float, calculator: Calculator) -> dict | None:
+    """Tag recording that structure was relaxed by RelaxCalc with calculator to a force tolerance of fmax."""
+    token = _get_calculator_token(calculator)
+    if token is None:
+        return None
+    return {
+        "fmax": fmax,
+        "calculator": token,
+        "species": [str(sp) for sp in structure.species],
+        "lattice": structure.lattice.matrix.tolist(),
+        "frac_coords": structure.frac_coords.tolist(),
+    }
+
+
+def is_relaxed(structure: Structure, fmax: float, calculator: Calculator) -> bool:
+    """Whether a structure was relaxed (including the cell) by RelaxCalc with the same calculator object to a
+    force tolerance of at most fmax.
+
+    This lets property calculators skip redundant relaxations when they are chained on the final_structure
+    returned by another calculation. The calculator is matched by object, so structures relaxed in another
+    process (e.g. with calc_many and n_jobs > 1) or with a different calculator are relaxed again. The tag also
+    stores the relaxed geometry, so copies that were strained, perturbed or otherwise modified since (beyond
+    RELAXED_TOL) are relaxed again as well.
+
+    Args:
+        structure: Pymatgen structure.
+        fmax: Force tolerance the structure must be relaxed to.
+        calculator: ASE Calculator the structure must be relaxed with.
+
+    Returns:
+        bool: True if the structure is tagged as relaxed with calculator to at most fmax and is unchanged since.
+    """
+    tag = structure.properties.get(RELAXED_KEY)
+    if not (
+        isinstance(tag, dict)
+        and tag.get("calculator") is not None
+        and tag.get("calculator") == _get_calculator_token(calculator)
+        and tag.get("fmax", float("inf")) <= fmax
+        and tag.get("species") == [str(sp) for sp in structure.species]
+    ):
+        return False
+    frac_diff = structure.frac_coords - np.asarray(tag["frac_coords"])
+    return np.allclose(structure.lattice.matrix, tag["lattice"], rtol=0, atol=RELAXED_TOL) and np.allclose(
+        frac_diff - np.round(frac_diff), 0, rtol=0, atol=RELAXED_TOL
+    )
+
+
 class TrajectoryObserver:
     """Trajectory observer is a hook in the relaxation process that saves the
     intermediate structures.
@@ -113,7 +180,8 @@ class RelaxCalc(PropCalc):
             structure: Pymatgen structure.
 
         Returns: {
-            final_structure: final_structure,
+            final_structure: final_structure, tagged as relaxed (see is_relaxed) if the cell was relaxed and
+                the relaxation converged,
             energy: trajectory observer final energy in eV,
             volume: lattice.volume in A^3,
             a: lattice.a in A,
@@ -122,6 +190,7 @@ class RelaxCalc(PropCalc):
             alpha: lattice.alpha in degrees,
             beta: lattice.beta in degrees,
             gamma: lattice.gamma in degrees,
+            final_stress: stress of the final structure as a 3x3 matrix in eV/A^3 if relax_cell, else None,
         }
         """
         atoms = AseAtomsAdaptor.get_atoms(structure)
@@ -133,14 +202,22 @@ class RelaxCalc(PropCalc):
                 atoms = self.cell_filter(atoms)
             optimizer = self.optimizer(atoms)
             optimizer.attach(obs, interval=self.interval)
-            optimizer.run(fmax=self.fmax, steps=self.max_steps)
+            converged = optimizer.run(fmax=self.fmax, steps=self.max_steps)
             if self.traj_file is not None:
                 obs()
                 obs.save(self.traj_file)
+        final_stress = None
         if self.relax_cell:
             atoms = atoms.atoms
+            # the cell filter already evaluated the stress at the final step, so this is read from the calculator
+            final_stress = atoms.get_stress(voigt=False)
 
         final_structure = AseAtomsAdaptor.get_structure(atoms)
+        # the properties dict is shared with the input structure via atoms.info, so copy it without any stale tag
+        # before re-tagging to leave the input untouched
+        final_structure.properties = {key: val for key, val in final_structure.properties.items() if key != RELAXED_KEY}
+        if self.relax_cell and converged and (tag := _get_relaxed_tag(final_structure, self.fmax, self.calculator)):
+            final_structure.properties[RELAXED_KEY] = tag
         lattice = final_structure.lattice
 
         return {
@@ -153,4 +230,5 @@ class RelaxCalc(PropCalc):
             "beta": lattice.beta,
             "gamma": lattice.gamma,
             "volume": lattice.volume,
+            "final_stress": final_stress,
         }
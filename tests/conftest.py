@@ -18,6 +18,8 @@ import pytest
 from matgl.ext.ase import M3GNetCalculator
 from pymatgen.util.testing import PymatgenTest
 
+from matcalc.relaxation import RelaxCalc
+
 if TYPE_CHECKING:
     from pymatgen.core import Structure
 
@@ -43,3 +45,18 @@ def M3GNetCalc() -> M3GNetCalculator:
     """M3GNet calculator as session-scoped fixture."""
     potential = matgl.load_model("M3GNet-MP-2021.2.8-PES")
     return M3GNetCalculator(potential=potential, stress_weight=0.01)
+
+
+@pytest.fixture
+def cell_relaxations(monkeypatch: pytest.MonkeyPatch) -> list:
+    """Calculators of the cell relaxations run by RelaxCalc.calc during a test, in order."""
+    relax_calc = RelaxCalc.calc
+    calculators = []
+
+    def count_cell_relaxations(self: RelaxCalc, structure: Structure) -> dict:
+        if self.relax_cell:
+            calculators.append(self.calculator)
+        return relax_calc(self, structure)
+
+    monkeypatch.setattr(RelaxCalc, "calc", count_cell_relaxations)
+    return calculators
@@ -2,15 +2,28 @@
 
 from __future__ import annotations
 
+import copy
 from typing import TYPE_CHECKING
 
 import numpy as np
 import pytest
 from ase.filters import ExpCellFilter
+from pymatgen.analysis.elasticity import ElasticTensor
+from pymatgen.symmetry.analyzer import SpacegroupAnalyzer
 
-from matcalc.elasticity import ElasticityCalc
+from matcalc.elasticity import (
+    ElasticityCalc,
+    _fit_strain_states,
+    _fit_strain_stress,
+    _fit_strain_stress_loops,
+    _fit_strain_stress_numpy,
+    _get_vrh_moduli,
+)
+from matcalc.relaxation import RelaxCalc
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from matgl.ext.ase import M3GNetCalculator
     from pymatgen.core import Structure
 
@@ -74,3 +87,98 @@ def test_elastic_calc_invalid_states(M3GNetCalc: M3GNetCalculator) -> None:
         ElasticityCalc(M3GNetCalc, norm_strains=[0.0, 0.1])
     with pytest.raises(ValueError, match="strains must be non-zero"):
         ElasticityCalc(M3GNetCalc, shear_strains=[0.0, 0.1])
+
+
+@pytest.mark.parametrize("fit_strain_stress", [_fit_strain_stress_numpy, _fit_strain_stress_loops, _fit_strain_stress])
+def test_fit_strain_stress(fit_strain_stress: Callable) -> None:
+    rng = np.random.default_rng(0)
+    strain = np.linspace(-0.004, 0.004, num=5)
+    stresses = rng.normal(size=(5, 6))
+    slopes, residuals_sum = fit_strain_stress(strain, stresses)
+    fits = [np.polyfit(strain, stresses[:, jj], 1, full=True) for jj in range(6)]
+    assert slopes == pytest.approx([fit[0][0] for fit in fits])
+    assert residuals_sum == pytest.approx(sum(fit[1][0] for fit in fits))
+
+    # two points are fitted exactly, as with np.polyfit
+    assert fit_strain_stress(strain[:2], stresses[:2])[1] == 0.0
+
+
+def test_fit_strain_states() -> None:
+    rng = np.random.default_rng(0)
+    n_samples = np.array([5, 3])
+    all_strains = np.zeros((2, 5))
+    all_stresses = np.zeros((2, 5, 6))
+    for ii, n_sample in enumerate(n_samples):
+        all_strains[ii, :n_sample] = np.linspace(-0.004, 0.004, num=n_sample)
+        all_stresses[ii, :n_sample] = rng.normal(size=(n_sample, 6))
+    c_ij, residuals_sum = _fit_strain_states(all_strains, all_stresses, n_samples)
+    fits = [_fit_strain_stress_numpy(all_strains[ii, :nn], all_stresses[ii, :nn]) for ii, nn in enumerate(n_samples)]
+    assert c_ij == pytest.approx(np.array([fit[0] for fit in fits]))
+    assert residuals_sum == pytest.approx(sum(fit[1] for fit in fits))
+
+
+def test_fit_kernels_compiled() -> None:
+    pytest.importorskip("numba")
+    # the dispatchers are numba-compiled when numba is available
+    assert _fit_strain_stress.py_func is _fit_strain_stress_loops
+    assert hasattr(_fit_strain_states, "py_func")
+
+
+def test_get_vrh_moduli() -> None:
+    rng = np.random.default_rng(0)
+    c_ij = rng.normal(size=(6, 6))
+    c_ij = c_ij @ c_ij.T + 6 * np.eye(6)
+    elastic_tensor = ElasticTensor.from_voigt(c_ij)
+    assert _get_vrh_moduli(c_ij) == pytest.approx((elastic_tensor.k_vrh, elastic_tensor.g_vrh, elastic_tensor.y_mod))
+
+
+def test_elastic_calc_cubic_symmetry(Li2O: Structure, M3GNetCalc: M3GNetCalculator) -> None:
+    structure = SpacegroupAnalyzer(Li2O).get_conventional_standard_structure()
+    strains = list(np.linspace(-0.004, 0.004, num=4))
+    full_results = ElasticityCalc(M3GNetCalc, norm_strains=strains, shear_strains=strains, relax_structure=False).calc(
+        structure
+    )
+    results = ElasticityCalc(
+        M3GNetCalc, norm_strains=strains, shear_strains=strains, relax_structure=False, symprec=0.1
+    ).calc(structure)
+    voigt = results["elastic_tensor"].voigt
+    assert voigt[0, 0] == voigt[1, 1] == voigt[2, 2]
+    assert voigt[3, 3] == voigt[4, 4] == voigt[5, 5]
+    assert results["bulk_modulus_vrh"] == pytest.approx(full_results["bulk_modulus_vrh"], rel=1e-2)
+    assert results["shear_modulus_vrh"] == pytest.approx(full_results["shear_modulus_vrh"], rel=1e-2)
+
+
+def test_elastic_calc_skips_relaxed_structure(
+    Li2O: Structure, M3GNetCalc: M3GNetCalculator, cell_relaxations: list
+) -> None:
+    structure = RelaxCalc(M3GNetCalc).calc(Li2O)["final_structure"]
+    ElasticityCalc(M3GNetCalc).calc(structure)
+    # only the explicit relaxation above was run
+    assert cell_relaxations == [M3GNetCalc]
+
+    # structures relaxed with another calculator are relaxed again
+    other_calc = copy.copy(M3GNetCalc)
+    ElasticityCalc(other_calc).calc(structure)
+    assert cell_relaxations == [M3GNetCalc, other_calc]
+
+    # strained or perturbed copies of a relaxed structure are relaxed again
+    strained = structure.copy()
+    strained.apply_strain(0.05)
+    ElasticityCalc(M3GNetCalc).calc(strained)
+    perturbed = structure.copy()
+    perturbed.perturb(0.1)
+    ElasticityCalc(M3GNetCalc).calc(perturbed)
+    assert cell_relaxations == [M3GNetCalc, other_calc, M3GNetCalc, M3GNetCalc]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"norm_strains": 0.004, "shear_strains": 0.004, "symprec": 0.1}],
+)
+def test_elastic_calc_n_jobs(Li2O: Structure, M3GNetCalc: M3GNetCalculator, kwargs: dict) -> None:
+    # the cubic case only has 2 deformations, i.e. fewer than n_jobs
+    structure = SpacegroupAnalyzer(Li2O).get_conventional_standard_structure()
+    serial = ElasticityCalc(M3GNetCalc, relax_structure=False, **kwargs).calc(structure)
+    parallel = ElasticityCalc(M3GNetCalc, relax_structure=False, n_jobs=3, **kwargs).calc(structure)
+    assert np.allclose(parallel["elastic_tensor"], serial["elastic_tensor"])
+    assert parallel["bulk_modulus_vrh"] == pytest.approx(serial["bulk_modulus_vrh"])
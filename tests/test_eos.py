@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+import copy
 from typing import TYPE_CHECKING
 
 import pytest
 from ase.filters import ExpCellFilter
 
 from matcalc.eos import EOSCalc
+from matcalc.relaxation import RelaxCalc
 
 if TYPE_CHECKING:
     from matgl.ext.ase import M3GNetCalculator
@@ -39,3 +41,17 @@ def test_eos_calc(
     results = list(eos_calc.calc_many([Li2O, LiFePO4]))
     assert len(results) == 2
     assert results[1]["bulk_modulus_bm"] == pytest.approx(54.5953851822073, rel=1e-2)
+
+
+def test_eos_calc_skips_relaxed_structure(
+    Li2O: Structure, M3GNetCalc: M3GNetCalculator, cell_relaxations: list
+) -> None:
+    structure = RelaxCalc(M3GNetCalc).calc(Li2O)["final_structure"]
+    EOSCalc(M3GNetCalc).calc(structure)
+    # only the explicit relaxation above was run
+    assert cell_relaxations == [M3GNetCalc]
+
+    # structures relaxed with another calculator are relaxed again
+    other_calc = copy.copy(M3GNetCalc)
+    EOSCalc(other_calc).calc(structure)
+    assert cell_relaxations == [M3GNetCalc, other_calc]
@@ -2,13 +2,16 @@
 
 from __future__ import annotations
 
+import copy
 import inspect
 import os
 from typing import TYPE_CHECKING
 
+import numpy as np
 import pytest
 
-from matcalc.phonon import PhononCalc
+from matcalc.phonon import PhononCalc, load_force_constants
+from matcalc.relaxation import RelaxCalc
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -74,3 +77,74 @@ def test_phonon_calc(
             assert os.path.isfile(str(instance_val))
         elif not default_path and not instance_val:
             assert not os.path.isfile(default_path)
+
+
+def test_phonon_calc_force_constants_only(Li2O: Structure, M3GNetCalc: M3GNetCalculator) -> None:
+    phonon_calc = PhononCalc(
+        calculator=M3GNetCalc, relax_structure=False, write_phonon=False, run_mesh=False, run_thermal=False
+    )
+    result = phonon_calc.calc(Li2O)
+    assert result["thermal_properties"] is None
+    assert result["phonon"].mesh is None
+    assert result["phonon"].force_constants.shape == (24, 24, 3, 3)
+
+
+@pytest.mark.parametrize(
+    ("force_constants_format", "custom_filename", "filename"),
+    [
+        ("text", "fc", "fc"),
+        ("npz", "fc.npz", "fc.npz"),
+        ("npz", "fc", "fc.npz"),
+        ("text", "", "force_constants"),
+        ("npz", "", "force_constants.npz"),
+    ],
+)
+def test_phonon_calc_force_constants_format(
+    Li2O: Structure,
+    M3GNetCalc: M3GNetCalculator,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    force_constants_format: str,
+    custom_filename: str,
+    filename: str,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    phonon_calc = PhononCalc(
+        calculator=M3GNetCalc,
+        relax_structure=False,
+        write_phonon=False,
+        run_thermal=False,
+        write_force_constants=custom_filename or True,
+        force_constants_format=force_constants_format,
+    )
+    assert phonon_calc.write_force_constants == filename
+    result = phonon_calc.calc(Li2O)
+    assert os.listdir(tmp_path) == [filename]
+    force_constants = load_force_constants(phonon_calc.write_force_constants)
+    assert np.allclose(force_constants, result["phonon"].force_constants)
+
+    with pytest.raises(ValueError, match="Unknown force_constants_format='hdf5'"):
+        PhononCalc(calculator=M3GNetCalc, force_constants_format="hdf5")
+
+
+def test_phonon_calc_skips_relaxed_structure(
+    Li2O: Structure, M3GNetCalc: M3GNetCalculator, cell_relaxations: list
+) -> None:
+    structure = RelaxCalc(M3GNetCalc).calc(Li2O)["final_structure"]
+    PhononCalc(M3GNetCalc, write_phonon=False, run_thermal=False).calc(structure)
+    # only the explicit relaxation above was run
+    assert cell_relaxations == [M3GNetCalc]
+
+    # structures relaxed with another calculator are relaxed again
+    other_calc = copy.copy(M3GNetCalc)
+    PhononCalc(other_calc, write_phonon=False, run_thermal=False).calc(structure)
+    assert cell_relaxations == [M3GNetCalc, other_calc]
+
+
+@pytest.mark.parametrize("n_jobs", [2, 4])
+def test_phonon_calc_n_jobs(Li2O: Structure, M3GNetCalc: M3GNetCalculator, n_jobs: int) -> None:
+    # Li2O has 3 displacements, i.e. fewer than n_jobs=4
+    kwargs = {"relax_structure": False, "write_phonon": False, "run_mesh": False, "run_thermal": False}
+    serial = PhononCalc(M3GNetCalc, **kwargs).calc(Li2O)
+    parallel = PhononCalc(M3GNetCalc, n_jobs=n_jobs, **kwargs).calc(Li2O)
+    assert np.allclose(parallel["phonon"].force_constants, serial["phonon"].force_constants)
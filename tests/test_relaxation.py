@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import copy
 from typing import TYPE_CHECKING
 
 import pytest
 from ase.filters import ExpCellFilter, FrechetCellFilter
 
-from matcalc.relaxation import RelaxCalc
+from matcalc.relaxation import RelaxCalc, is_relaxed
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -35,6 +36,18 @@ def test_relax_calc_single(
     assert beta == pytest.approx(60, abs=0.5)
     assert gamma == pytest.approx(60, abs=0.5)
     assert final_struct.volume == pytest.approx(a * b * c / 2**0.5, abs=0.1)
+    assert result["final_stress"].shape == (3, 3)
+    assert is_relaxed(final_struct, fmax=0.1, calculator=M3GNetCalc)
+    assert not is_relaxed(final_struct, fmax=0.01, calculator=M3GNetCalc)
+    assert not is_relaxed(final_struct, fmax=0.1, calculator=copy.copy(M3GNetCalc))
+    assert not is_relaxed(Li2O, fmax=0.1, calculator=M3GNetCalc)
+    strained = final_struct.copy()
+    strained.apply_strain(0.05)
+    assert not is_relaxed(strained, fmax=0.1, calculator=M3GNetCalc)
+    perturbed = final_struct.copy()
+    perturbed.perturb(0.1)
+    assert not is_relaxed(perturbed, fmax=0.1, calculator=M3GNetCalc)
+    assert is_relaxed(final_struct.copy(), fmax=0.1, calculator=M3GNetCalc)
 
 
 @pytest.mark.parametrize(("cell_filter", "expected_a"), [(ExpCellFilter, 3.291071), (FrechetCellFilter, 3.288585)])
@@ -48,3 +61,17 @@ def test_relax_calc_many(Li2O: Structure, M3GNetCalc: M3GNetCalculator, cell_fil
 def test_relax_calc_invalid_optimizer(M3GNetCalc: M3GNetCalculator) -> None:
     with pytest.raises(ValueError, match="Unknown optimizer='invalid', must be one of "):
         RelaxCalc(M3GNetCalc, optimizer="invalid")
+
+
+def test_relax_calc_keeps_input_properties(Li2O: Structure, M3GNetCalc: M3GNetCalculator) -> None:
+    structure = Li2O.copy()
+    structure.properties = {"source": "mp"}
+    result = RelaxCalc(M3GNetCalc).calc(structure)
+    assert structure.properties == {"source": "mp"}
+    assert not is_relaxed(structure, fmax=0.1, calculator=M3GNetCalc)
+    assert result["final_structure"].properties["source"] == "mp"
+
+    # relaxing a tagged structure does not strip the tag from it
+    final_struct = result["final_structure"]
+    RelaxCalc(M3GNetCalc, max_steps=0).calc(final_struct)
+    assert is_relaxed(final_struct, fmax=0.1, calculator=M3GNetCalc)